@@ -4,46 +4,257 @@ ESP32 MAC Address Collector and Flasher
 Detects new ESP32 boards, collects BT MAC addresses, and flashes firmware
 """
 
+import importlib.util
+import os
+import select
+from array import array
 import serial
 import serial.tools.list_ports
+import sys
 import time
-import re
 import json
 import subprocess
+import tempfile
+from glob import glob
 from datetime import datetime
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# MACs are 48-bit; they are kept as ints (array 'Q') in memory
+_MAC_MASK = 0xFFFFFFFFFFFF
+
+# USB VID/PID pairs of the USB-serial bridges used on ESP32 boards
+ESP32_VIDPID = {
+    (0x10C4, 0xEA60),  # Silicon Labs CP210x
+    (0x1A86, 0x7523),  # WCH CH340
+    (0x1A86, 0x55D4),  # WCH CH9102
+    (0x1A86, 0x55D3),  # WCH CH343
+    (0x0403, 0x6001),  # FTDI FT232R
+    (0x0403, 0x6010),  # FTDI FT2232H (ESP-Prog, ESP-WROVER-KIT)
+    (0x303A, 0x1001),  # Espressif native USB (ESP32-S3/C3 USB-Serial/JTAG)
+    (0x303A, 0x0002),  # Espressif native USB (ESP32-S2)
+}
+
+_HEX = frozenset('0123456789abcdefABCDEF')
+_MAC_SEPARATORS = frozenset(':-')
+
+
+def _is_word_char(c):
+    return c.isalnum() or c == '_'
+
+
+def _mac_at(line, i, sep):
+    """Check whether a MAC using separator sep starts at line[i]"""
+    # All five separators must match, so mixed "aa:bb-cc..." is rejected
+    if not all(line[i + j] == sep for j in range(2, 17, 3)):
+        return False
+    if not all(line[i + j] in _HEX and line[i + j + 1] in _HEX for j in range(0, 17, 3)):
+        return False
+    # Require word boundaries so hex dumps and longer ids don't match
+    return not ((i > 0 and _is_word_char(line[i - 1])) or
+                (i + 17 < len(line) and _is_word_char(line[i + 17])))
+
+
+def _find_mac(line):
+    """Return the first XX:XX:XX:XX:XX:XX (or XX-XX-...) MAC in line, or None"""
+    found = None
+    for sep in _MAC_SEPARATORS:
+        # Jump between separator positions with str.find (a C-level scan) and only
+        # validate around them, rather than checking every offset in Python
+        pos = line.find(sep, 2)
+        while pos != -1 and pos + 15 <= len(line):
+            i = pos - 2
+            if found is not None and i >= found:
+                break
+            if _mac_at(line, i, sep):
+                found = i
+                break
+            pos = line.find(sep, pos + 1)
+    if found is None:
+        return None
+    return line[found:found + 17].upper().replace('-', ':')
+
+
+def _mac_to_int(mac_str):
+    """Convert an "AA:BB:CC:DD:EE:FF" string to a 48-bit int"""
+    return int.from_bytes(bytes.fromhex(mac_str.replace(':', '')), 'big')
+
+
+def _int_to_mac(mac_int):
+    """Convert a 48-bit int to an "AA:BB:CC:DD:EE:FF" string"""
+    return mac_int.to_bytes(6, 'big').hex(':').upper()
+
+
+def _json_dumps(obj, indent=False):
+    """Serialize obj to JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode('utf-8')
+
+
+def _json_loads(data):
+    """Parse JSON from bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _list_serial_ports():
+    """List candidate serial ports without a full pyserial scan where possible"""
+    if sys.platform.startswith('linux'):
+        # ESP32 boards only ever show up as USB serial (ttyUSB) or USB CDC (ttyACM);
+        # skip pyserial's sysfs walk of every ttyS*/ttyAMA*/rfcomm* device
+        from serial.tools.list_ports_linux import SysFS
+        devices = glob('/dev/ttyUSB*') + glob('/dev/ttyACM*')
+        return [SysFS(device) for device in devices]
+    return serial.tools.list_ports.comports()
+
+
+def _esp32_ports(ignored=None):
+    """Device names of connected ports that look like ESP32 boards
+    
+    USB ports that don't match ESP32_VIDPID are reported once and added to
+    the ignored set, so it is clear why a board isn't picked up.
+    """
+    ports = set()
+    for port in _list_serial_ports():
+        if (port.vid, port.pid) in ESP32_VIDPID:
+            ports.add(port.device)
+        elif ignored is not None and port.vid is not None and port.device not in ignored:
+            ignored.add(port.device)
+            print(f"Ignoring {port.device} (USB {port.vid:04X}:{port.pid:04X} is not a known "
+                  f"ESP32 bridge; add it to ESP32_VIDPID if needed)")
+    return ports
+
 
 class ESP32Manager:
+    # Seconds without new data after which an unterminated line is parsed anyway
+    PARTIAL_LINE_TIMEOUT = 2
+    
     def __init__(self, baudrate=115200, timeout=30):
         self.baudrate = baudrate
         self.timeout = timeout
-        self.mac_database = []
+        # Devices are stored column-wise: row i of each column is one device
+        self._ids = array('I')
+        self._wifi = array('Q')
+        self._bt = array('Q')
+        self._ts = []
+        self._ports = []
+        # WiFi MACs already in the database, for O(1) duplicate checks
+        self._known = set()
         self.device_counter = 1
-        self.db_file = "esp32_mac_database.json"
+        # Non-ESP32 USB serial ports that have already been reported
+        self._ignored_ports = set()
+        # One JSON object per device; next_id etc. live in a small sidecar file
+        self.db_file = "esp32_mac_database.jsonl"
+        self.meta_file = self.db_file + ".meta"
+        self.legacy_db_file = "esp32_mac_database.json"
+        self._db_path = Path(self.db_file)
+        self._meta_path = Path(self.meta_file)
+        self._legacy_db_path = Path(self.legacy_db_file)
         
         # Load existing database if available
         self.load_database()
     
+    @property
+    def mac_database(self):
+        """All devices as a list of dicts (built on demand from the columns)"""
+        return list(self.devices())
+    
+    def devices(self):
+        """Yield each device as a dict, in the on-disk format"""
+        for i in range(len(self._ids)):
+            yield {
+                'id': self._ids[i],
+                'wifi_mac': _int_to_mac(self._wifi[i]),
+                'bt_mac': _int_to_mac(self._bt[i]),
+                'timestamp': self._ts[i],
+                'port': self._ports[i]
+            }
+    
+    def _add_device(self, device_info):
+        """Append a device dict to the in-memory columns"""
+        wifi_int = _mac_to_int(device_info['wifi_mac'])
+        self._ids.append(device_info['id'])
+        self._wifi.append(wifi_int)
+        self._known.add(wifi_int)
+        self._bt.append(_mac_to_int(device_info['bt_mac']))
+        self._ts.append(device_info['timestamp'])
+        self._ports.append(device_info.get('port'))
+    
     def load_database(self):
         """Load existing MAC database from file"""
-        if Path(self.db_file).exists():
-            with open(self.db_file, 'r') as f:
-                data = json.load(f)
-                self.mac_database = data.get('devices', [])
-                self.device_counter = data.get('next_id', 1)
-            print(f"Loaded {len(self.mac_database)} devices from database")
+        if self._db_path.exists():
+            with self._db_path.open('rb') as f:
+                lines = f.readlines()
+            offset = 0
+            for i, line in enumerate(lines):
+                if line.strip():
+                    try:
+                        device_info = _json_loads(line)
+                    except ValueError:
+                        if i != len(lines) - 1:
+                            raise
+                        # A write cut off mid-append; drop it so later appends start cleanly
+                        print(f"Warning: discarding incomplete last line of {self._db_path}")
+                        os.truncate(self._db_path, offset)
+                        break
+                    self._add_device(device_info)
+                offset += len(line)
+            else:
+                if lines and not lines[-1].endswith(b'\n'):
+                    with self._db_path.open('ab') as f:
+                        f.write(b'\n')
+            
+            # The meta file is written after the append, so it may lag behind the data
+            next_id = 1
+            if self._meta_path.exists():
+                next_id = _json_loads(self._meta_path.read_bytes()).get('next_id', 1)
+            if self._ids:
+                next_id = max(next_id, max(self._ids) + 1)
+            self.device_counter = next_id
+            print(f"Loaded {len(self._ids)} devices from database")
+        elif self._legacy_db_path.exists():
+            # Convert a database written by older versions to the JSONL format
+            data = _json_loads(self._legacy_db_path.read_bytes())
+            for device_info in data.get('devices', []):
+                self._add_device(device_info)
+            self.device_counter = data.get('next_id', 1)
+            print(f"Loaded {len(self._ids)} devices from {self._legacy_db_path}")
+            self.save_database()
     
-    def save_database(self):
-        """Save MAC database to file"""
-        data = {
-            'devices': self.mac_database,
+    def _replace_file(self, path, data):
+        """Write data to path via a temp file so a crash never leaves it partial"""
+        tmp_path = path.with_name(path.name + '.tmp')
+        with tmp_path.open('wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    
+    def _save_meta(self):
+        """Save next_id and last update time to the sidecar file"""
+        meta = {
             'next_id': self.device_counter,
             'last_updated': datetime.now().isoformat()
         }
-        with open(self.db_file, 'w') as f:
-            json.dump(data, indent=2, fp=f)
-        print(f"Database saved to {self.db_file}")
+        self._replace_file(self._meta_path, _json_dumps(meta, indent=True))
+    
+    def save_database(self):
+        """Rewrite the whole MAC database file"""
+        self._replace_file(self._db_path, b''.join(_json_dumps(d) + b'\n' for d in self.devices()))
+        self._save_meta()
+        print(f"Database saved to {self._db_path}")
+    
+    def save_one(self, device_info):
+        """Append a single device to the MAC database file"""
+        with self._db_path.open('ab') as f:
+            f.write(_json_dumps(device_info) + b'\n')
+        self._save_meta()
+        print(f"Device saved to {self._db_path}")
     
     def detect_esp32_port(self, known_ports=None):
         """Detect new ESP32 port connection"""
@@ -53,7 +264,7 @@ class ESP32Manager:
             known_ports = set()
         
         while True:
-            current_ports = set([port.device for port in serial.tools.list_ports.comports()])
+            current_ports = _esp32_ports(self._ignored_ports)
             new_ports = current_ports - known_ports
             
             if new_ports:
@@ -65,35 +276,19 @@ class ESP32Manager:
     
     def parse_mac_from_boot_message(self, line):
         """Extract MAC address from ESP32 boot messages"""
-        # Look for MAC address patterns like "MAC: xx:xx:xx:xx:xx:xx" or similar
-        mac_patterns = [
-            r'[Mm][Aa][Cc][:\s]+([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})',
-            r'([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})',
-        ]
-        
-        for pattern in mac_patterns:
-            match = re.search(pattern, line)
-            if match:
-                mac = match.group(0)
-                # Normalize MAC address format
-                mac = mac.replace('MAC:', '').replace('Mac:', '').replace('mac:', '').strip()
-                mac = mac.replace('-', ':').upper()
-                return mac
-        return None
+        return _find_mac(line)
     
-    def increment_mac(self, mac_str, increment=2):
-        """Increment MAC address by specified value"""
-        # Remove colons and convert to integer
-        mac_int = int(mac_str.replace(':', ''), 16)
-        # Add increment
-        new_mac_int = mac_int + increment
-        # Convert back to MAC format
-        mac_hex = format(new_mac_int, '012X')
-        # Format as MAC address
-        new_mac = ':'.join([mac_hex[i:i+2] for i in range(0, 12, 2)])
-        return new_mac
+    def increment_mac(self, mac, increment=2):
+        """Increment MAC address (int or "AA:BB:..." string) by specified value
+        
+        Returns the same type it was given.
+        """
+        if isinstance(mac, str):
+            return _int_to_mac(self.increment_mac(_mac_to_int(mac), increment))
+        # Wrap around within 48 bits rather than overflowing to 7 bytes
+        return (mac + increment) & _MAC_MASK
     
-    def collect_mac_from_reset(self, port):
+    def collect_mac_from_reset(self, port, verbose=False):
         """Wait for ESP32 reset and collect MAC address"""
         print(f"\n{'='*60}")
         print(f"Device #{self.device_counter}")
@@ -103,100 +298,243 @@ class ESP32Manager:
         
         try:
             ser = serial.Serial(port, self.baudrate, timeout=2)
+            
+            # Drop the USB-serial latency timer (16 ms on FTDI) on Linux
+            if sys.platform.startswith('linux'):
+                try:
+                    ser.set_low_latency_mode(True)
+                except ValueError:
+                    pass  # driver doesn't support ASYNC_LOW_LATENCY
             time.sleep(0.5)
             
             # Clear any existing data
             ser.reset_input_buffer()
             
             start_time = time.time()
+            buf = bytearray()
+            last_data = start_time
+            partial_checked = False
             wifi_mac = None
             
-            while time.time() - start_time < self.timeout:
-                if ser.in_waiting > 0:
-                    try:
-                        line = ser.readline().decode('utf-8', errors='ignore').strip()
-                        if line:
-                            print(f"  {line}")
-                            
-                            # Try to extract MAC address
-                            mac = self.parse_mac_from_boot_message(line)
-                            if mac and not wifi_mac:
-                                wifi_mac = mac
-                                print(f"\n✓ WiFi MAC detected: {wifi_mac}")
-                                bt_mac = self.increment_mac(wifi_mac, 2)
-                                print(f"✓ BT MAC calculated: {bt_mac}")
-                                
-                                # Store in database
-                                device_info = {
-                                    'id': self.device_counter,
-                                    'wifi_mac': wifi_mac,
-                                    'bt_mac': bt_mac,
-                                    'timestamp': datetime.now().isoformat(),
-                                    'port': port
-                                }
-                                self.mac_database.append(device_info)
-                                self.device_counter += 1
-                                self.save_database()
-                                
-                                ser.close()
-                                return device_info
-                    except UnicodeDecodeError:
+            while wifi_mac is None:
+                remaining = self.timeout - (time.time() - start_time)
+                if remaining <= 0:
+                    break
+                
+                if os.name == 'posix':
+                    # Sleep in the kernel until the port is readable instead of polling
+                    readable, _, _ = select.select([ser.fd], [], [],
+                                                   min(remaining, self.PARTIAL_LINE_TIMEOUT))
+                    has_data = bool(readable)
+                else:
+                    # select() only handles sockets on Windows
+                    has_data = ser.in_waiting > 0
+                    if not has_data:
+                        time.sleep(0.01)
+                
+                if not has_data:
+                    # Like readline() with a timeout, parse a line that never got its newline
+                    if buf and not partial_checked and \
+                            time.time() - last_data >= self.PARTIAL_LINE_TIMEOUT:
+                        partial_checked = True
+                        wifi_mac = self.parse_mac_from_boot_message(
+                            buf.decode('utf-8', errors='ignore').strip())
+                    continue
+                
+                # Read whatever has arrived in one call instead of byte-by-byte readline()
+                buf += ser.read(ser.in_waiting or 1)
+                last_data = time.time()
+                partial_checked = False
+                
+                while wifi_mac is None and b'\n' in buf:
+                    raw_line, _, buf = buf.partition(b'\n')
+                    line = raw_line.decode('utf-8', errors='ignore').strip()
+                    if not line:
                         continue
+                    if verbose:
+                        # Unflushed write; printing every boot line stalls the reader on slow consoles
+                        sys.stdout.write(f"  {line}\n")
+                    
+                    # Try to extract MAC address
+                    wifi_mac = self.parse_mac_from_boot_message(line)
+            
+            if wifi_mac is None and buf and not partial_checked:
+                wifi_mac = self.parse_mac_from_boot_message(
+                    buf.decode('utf-8', errors='ignore').strip())
             
             ser.close()
-            print("\n✗ Timeout waiting for MAC address")
-            return None
+            if wifi_mac is None:
+                print("\n✗ Timeout waiting for MAC address")
+                return None
+            return self._record_mac(wifi_mac, port)
             
         except serial.SerialException as e:
             print(f"Error opening port: {e}")
             return None
     
+    def _record_mac(self, wifi_mac, port):
+        """Add a newly detected board to the database; None if it is a duplicate"""
+        print(f"\n✓ WiFi MAC detected: {wifi_mac}")
+        wifi_int = _mac_to_int(wifi_mac)
+        if wifi_int in self._known:
+            device_id = self._ids[self._wifi.index(wifi_int)]
+            print(f"✗ Duplicate: already in database as Device #{device_id}")
+            return None
+        
+        bt_mac = _int_to_mac(self.increment_mac(wifi_int, 2))
+        print(f"✓ BT MAC calculated: {bt_mac}")
+        
+        # Store in database
+        device_info = {
+            'id': self.device_counter,
+            'wifi_mac': wifi_mac,
+            'bt_mac': bt_mac,
+            'timestamp': datetime.now().isoformat(),
+            'port': port
+        }
+        self._add_device(device_info)
+        self.device_counter += 1
+        self.save_one(device_info)
+        return device_info
+    
+    def _flash_args(self, port, binary_path, flash_address, chip):
+        """esptool arguments that erase the flash and write binary_path at flash_address"""
+        return [
+            '--chip', chip,
+            '--port', port,
+            '--baud', '921600',
+            'write_flash',
+            '--erase-all',
+            '-z',
+            flash_address,
+            binary_path
+        ]
+    
     def flash_firmware(self, port, binary_path, flash_address='0x10000', chip='esp32'):
         """Flash firmware to ESP32 using esptool"""
         print(f"\n{'='*60}")
         print(f"Flashing firmware to {port}")
         print(f"{'='*60}")
         
-        if not Path(binary_path).exists():
+        if not os.path.isfile(binary_path):
             print(f"✗ Error: Binary file not found: {binary_path}")
             return False
         
         try:
-            # Erase flash (optional - comment out if not needed)
-            print("Erasing flash...")
-            erase_cmd = [
-                'esptool.py',
-                '--chip', chip,
-                '--port', port,
-                'erase_flash'
-            ]
-            subprocess.run(erase_cmd, check=True)
-            
-            # Flash firmware
-            print(f"Flashing {binary_path}...")
-            flash_cmd = [
-                'esptool.py',
-                '--chip', chip,
-                '--port', port,
-                '--baud', '460800',
-                'write_flash',
-                '-z',
-                flash_address,
-                binary_path
-            ]
-            
-            result = subprocess.run(flash_cmd, check=True)
+            import esptool
+        except ImportError:
+            print("✗ Error: esptool not found. Install it with: pip install esptool")
+            return False
+        
+        esp = None
+        try:
+            # Erase and flash in a single esptool run (one sync handshake and stub upload),
+            # in-process to avoid starting another Python interpreter
+            print(f"Erasing flash and flashing {binary_path}...")
+            # Connect here rather than in esptool.main(), which only closes the port on success
+            esp = esptool.detect_chip(port)
+            # esptool.main() doesn't check --chip against a connection it is given
+            if chip != 'auto' and esp.CHIP_NAME.replace('-', '').lower() != chip.lower():
+                print(f"✗ Flash failed: expected {chip}, found {esp.CHIP_NAME}")
+                return False
+            esptool.main(self._flash_args(port, binary_path, flash_address, chip), esp=esp)
             print("✓ Flash complete!")
             return True
             
-        except subprocess.CalledProcessError as e:
+        except SystemExit as e:
+            # esptool's argument parser exits instead of raising
+            if e.code:
+                print(f"✗ Flash failed: esptool exited with {e.code}")
+                return False
+            print("✓ Flash complete!")
+            return True
+        except StopIteration:
+            # esptool 4.x raises this when the chip stops responding mid-operation
+            print("✗ Flash failed: the chip stopped responding")
+            return False
+        except (esptool.FatalError, OSError) as e:
+            # OSError includes serial.SerialException
             print(f"✗ Flash failed: {e}")
             return False
+        finally:
+            if esp is not None:
+                esp._port.close()
+    
+    def flash_firmware_many(self, ports_and_bins, flash_address='0x10000', chip='esp32'):
+        """Flash firmware to several ESP32 boards at once, one esptool process per port
+        
+        esptool runs as separate processes here (rather than in-process as in
+        flash_firmware) so the boards are flashed concurrently. They use the
+        esptool module of this interpreter, the same one flash_firmware imports.
+        
+        Returns a dict mapping each port to the exit code of its esptool run,
+        or None if flashing never started (e.g. binary not found).
+        """
+        # Two esptool processes on one UART would corrupt both flashes
+        targets = {}
+        for port, binary_path in ports_and_bins:
+            if port in targets:
+                print(f"Warning: {port} listed more than once; flashing it only once")
+                continue
+            targets[port] = binary_path
+        
+        print(f"\n{'='*60}")
+        print(f"Flashing firmware to {len(targets)} boards")
+        print(f"{'='*60}")
+        
+        if importlib.util.find_spec('esptool') is None:
+            print("✗ Error: esptool not found. Install it with: pip install esptool")
+            return dict.fromkeys(targets)
+        
+        results = {}
+        # port -> (running esptool process, output log)
+        jobs = {}
+        
+        try:
+            for port, binary_path in targets.items():
+                if not os.path.isfile(binary_path):
+                    print(f"✗ {port}: Binary file not found: {binary_path}")
+                    results[port] = None
+                    continue
+                print(f"Flashing {binary_path} to {port}...")
+                log = tempfile.TemporaryFile()
+                cmd = [sys.executable, '-m', 'esptool']
+                cmd += self._flash_args(port, binary_path, flash_address, chip)
+                try:
+                    proc = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT)
+                except BaseException:
+                    log.close()
+                    raise
+                jobs[port] = (proc, log)
+            
+            while jobs:
+                time.sleep(0.2)
+                for port, (proc, log) in list(jobs.items()):
+                    returncode = proc.poll()
+                    if returncode is None:
+                        continue
+                    del jobs[port]
+                    results[port] = returncode
+                    if returncode == 0:
+                        print(f"✓ {port}: Flash complete!")
+                    else:
+                        # Output is only shown for failures so parallel runs don't interleave
+                        log.seek(0)
+                        print(f"✗ {port}: Flash failed (exit code {returncode})")
+                        print(log.read().decode('utf-8', errors='ignore'))
+                    log.close()
+                    
         except FileNotFoundError:
-            print("✗ Error: esptool.py not found. Install it with: pip install esptool")
-            return False
+            print(f"✗ Error: Python interpreter not found: {sys.executable}")
+            for port, (proc, log) in jobs.items():
+                proc.kill()
+                log.close()
+            for port in targets:
+                results.setdefault(port, None)
+        
+        return results
     
-    def run_collection_mode(self, auto_flash=False, binary_path=None):
+    def run_collection_mode(self, auto_flash=False, binary_path=None, verbose=False):
         """Run in collection mode - detect boards and collect MACs"""
         print("\n" + "="*60)
         print("ESP32 MAC Address Collection Mode")
@@ -205,17 +543,17 @@ class ESP32Manager:
         if auto_flash and binary_path:
             print(f"Auto-flash enabled: {binary_path}")
         
-        known_ports = set([port.device for port in serial.tools.list_ports.comports()])
+        known_ports = _esp32_ports(self._ignored_ports)
         
         while True:
-            print(f"\nWaiting for new ESP32 board (Total collected: {len(self.mac_database)})...")
+            print(f"\nWaiting for new ESP32 board (Total collected: {len(self._ids)})...")
             port, known_ports = self.detect_esp32_port(known_ports)
             
             # Wait a moment for the port to stabilize
             time.sleep(1)
             
             # Collect MAC
-            device_info = self.collect_mac_from_reset(port)
+            device_info = self.collect_mac_from_reset(port, verbose)
             
             if device_info:
                 print(f"\n✓ Device #{device_info['id']} added to database")
@@ -228,7 +566,7 @@ class ESP32Manager:
                 
                 print("\nReady for next board. Remove current board and connect next one.")
             else:
-                print("\n✗ Failed to collect MAC. Please try again.")
+                print("\n✗ No new device added. Please try again or connect the next board.")
             
             # Option to quit
             print("\nPress Ctrl+C to stop collection mode")
@@ -236,12 +574,12 @@ class ESP32Manager:
     def print_database(self):
         """Print all collected MAC addresses"""
         print(f"\n{'='*80}")
-        print(f"ESP32 MAC Address Database ({len(self.mac_database)} devices)")
+        print(f"ESP32 MAC Address Database ({len(self._ids)} devices)")
         print(f"{'='*80}")
         print(f"{'ID':<5} {'WiFi MAC':<20} {'BT MAC':<20} {'Timestamp':<25}")
         print("-"*80)
         
-        for device in self.mac_database:
+        for device in self.devices():
             print(f"{device['id']:<5} {device['wifi_mac']:<20} {device['bt_mac']:<20} {device['timestamp']:<25}")
         print("="*80)
 
@@ -252,11 +590,12 @@ def main():
     parser = argparse.ArgumentParser(description='ESP32 MAC Collector and Flasher')
     parser.add_argument('--collect', action='store_true', help='Run in collection mode')
     parser.add_argument('--flash', type=str, help='Flash binary file to ESP32')
-    parser.add_argument('--port', type=str, help='Serial port (required for flash mode)')
+    parser.add_argument('--port', type=str, nargs='+', help='Serial port(s) (required for flash mode)')
     parser.add_argument('--auto-flash', type=str, help='Auto-flash binary after MAC collection')
     parser.add_argument('--address', type=str, default='0x10000', help='Flash address (default: 0x10000)')
     parser.add_argument('--chip', type=str, default='esp32', help='Chip type (default: esp32)')
     parser.add_argument('--show', action='store_true', help='Show collected MAC database')
+    parser.add_argument('--verbose', action='store_true', help='Print ESP32 boot messages while collecting')
     
     args = parser.parse_args()
     
@@ -265,12 +604,17 @@ def main():
     if args.show:
         manager.print_database()
     elif args.collect:
-        manager.run_collection_mode(auto_flash=bool(args.auto_flash), binary_path=args.auto_flash)
+        manager.run_collection_mode(auto_flash=bool(args.auto_flash), binary_path=args.auto_flash,
+                                    verbose=args.verbose)
     elif args.flash:
         if not args.port:
             print("Error: --port required for flash mode")
             return
-        manager.flash_firmware(args.port, args.flash, args.address, args.chip)
+        if len(args.port) > 1:
+            manager.flash_firmware_many([(port, args.flash) for port in args.port],
+                                        args.address, args.chip)
+        else:
+            manager.flash_firmware(args.port[0], args.flash, args.address, args.chip)
     else:
         parser.print_help()
 